@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+安装爬虫模块，并可选地用mypyc把正则解析器编译为C扩展
+用法: pip install .
+      编译加速: pip install mypy && python setup.py build_ext --inplace
+没有安装mypy时只安装普通Python模块；不安装也能直接运行 spider/hot_comments.py
+"""
+from setuptools import setup
+
+# [知识点: 可选依赖] mypyc随mypy一起安装，没有安装时跳过编译，不影响安装和运行
+try:
+    from mypyc.build import mypycify  # [库] 根据类型标注把Python模块编译为C扩展
+except ImportError:
+    mypycify = None
+
+setup(
+    name='ai_movie',
+    package_dir={'': 'spider'},  # [功能] spider目录不是包，模块和编译出的扩展都放在spider目录，与hot_comments.py同级
+    py_modules=['hot_comments', 'comment_parser'],
+    # [功能] 只编译纯函数的解析模块；爬虫主模块依赖较多动态特性，保持为普通Python
+    ext_modules=mypycify(['spider/comment_parser.py']) if mypycify is not None else [],
+)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+豆瓣短评页面的正则解析器
+功能：不构建DOM树，直接用预编译正则从HTML中提取短评字段
+说明：本模块只包含带严格类型标注的纯函数，可以用mypyc编译为C扩展以进一步提速
+      编译方法: pip install mypy && python setup.py build_ext --inplace
+      未编译时作为普通Python模块导入，行为完全相同
+"""
+
+# ============ 导入必要的库 ============
+import re  # [库] 正则表达式，用于快速提取短评字段
+from html import unescape  # [库] 把&amp;、&quot;等HTML实体还原为普通字符
+from typing import Dict, List, Union  # [语法: 类型提示] mypyc根据类型标注生成更快的C代码
+
+# [语法: 类型别名] 一条短评：字段名 -> 字符串或整数
+Comment = Dict[str, Union[str, int]]
+
+# [知识点: 正则快速解析] 豆瓣页面由模板生成，结构固定，用正则直接扫描比构建整棵DOM树快得多
+# 每条短评从<div class="comment-item ...">开始，到下一条短评为止；
+# 最后一条短评到短评列表下方的翻页栏<div id="paginator">为止，不把侧边栏等后续内容算进来
+_RE_ITEM = re.compile(
+    r'<div class="comment-item[^"]*"[^>]*?data-cid="(\d+)".*?(?=<div class="comment-item|<div id="paginator"|\Z)',
+    re.S,
+)
+_RE_USER = re.compile(r'<span class="comment-info">\s*<a[^>]*>([^<]*)</a>')
+_RE_RATING = re.compile(r'<span class="[^"]*allstar(\d+)[^"]*rating[^"]*"')
+_RE_SHORT = re.compile(r'<span class="short">(.*?)</span>', re.S)
+_RE_VOTES = re.compile(r'<span class="votes vote-count">\s*(\d+)\s*</span>')
+_RE_TIME = re.compile(r'<span class="comment-time[^"]*"[^>]*title="([^"]*)"')
+
+
+def parse_comments_regex(html_content: str) -> List[Comment]:
+    """
+    [函数] 用预编译正则解析HTML，不构建DOM树
+    
+    参数 (Input):
+        html_content: str - HTML网页源代码
+        
+    返回值 (Output):
+        List[Comment] - 短评列表，缺少必需字段的短评会被跳过（由调用方决定是否回退）
+    """
+    comments: List[Comment] = []
+    
+    for m in _RE_ITEM.finditer(html_content):
+        # [技巧] search(字符串, 起点, 终点) 只在这条短评的范围内查找，不需要切片复制字符串
+        start: int = m.start()
+        end: int = m.end()
+        short_m = _RE_SHORT.search(html_content, start, end)
+        if short_m is None:
+            continue  # [功能] 必需字段缺失，说明页面结构与预期不符
+        
+        # [功能] 模板中点赞数、用户名、评分、时间都在短评内容之前，
+        # 只在短评内容之前查找，即使缺少可选字段也不会匹配到这条短评之外的内容
+        fields_end: int = short_m.start()
+        user_m = _RE_USER.search(html_content, start, fields_end)
+        votes_m = _RE_VOTES.search(html_content, start, fields_end)
+        if user_m is None or votes_m is None:
+            continue
+        
+        rating_m = _RE_RATING.search(html_content, start, fields_end)  # 评分是可选的，有些用户没打分
+        time_m = _RE_TIME.search(html_content, start, fields_end)
+        
+        comment: Comment = {
+            'comment_id': m.group(1),  # 短评ID
+            'username': unescape(user_m.group(1)).strip() or '匿名',  # 用户名
+            'rating': int(rating_m.group(1)) // 10 if rating_m is not None else '',  # 评分（1-5星）
+            'content': unescape(short_m.group(1)).strip(),  # 短评内容
+            'votes': int(votes_m.group(1)),  # 点赞数
+            'time': time_m.group(1).strip() if time_m is not None else '',  # 发表时间
+        }
+        comments.append(comment)
+    
+    return comments
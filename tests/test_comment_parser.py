@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+正则解析器与BeautifulSoup解析器的一致性检查
+运行方法: pip install pytest && python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+# [功能] spider目录不是包，把它加入模块搜索路径后才能导入爬虫模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'spider'))
+
+pytest.importorskip('bs4')
+pytest.importorskip('lxml')
+
+from comment_parser import parse_comments_regex  # noqa: E402
+from hot_comments import DoubanCommentSpider  # noqa: E402
+
+
+def _item(cid, user, rating_span, content, votes):
+    """[函数] 按豆瓣模板拼出一条短评的HTML"""
+    return (
+        f'<div class="comment-item " data-cid="{cid}">'
+        f'<div class="comment"><h3>'
+        f'<span class="comment-vote"><span class="votes vote-count">{votes}</span></span>'
+        f'<span class="comment-info"><a href="https://www.douban.com/people/{cid}/">{user}</a>'
+        f'{rating_span}'
+        f'<span class="comment-time " title="2024-01-0{cid} 12:00:00">2024-01-0{cid}</span>'
+        f'</span></h3>'
+        f'<p class="comment-content"><span class="short">{content}</span></p>'
+        f'</div></div>'
+    )
+
+
+# [功能] 最后一条短评没有评分，后面的侧边栏里却有allstar评分标签，用来检查字段不会"串"到其他短评之外
+PAGE = (
+    '<html><body><div id="comments" class="mod-bd">'
+    + _item(1, '用户一', '<span class="allstar50 rating" title="力荐"></span>', '很好看', 12)
+    + _item(2, '用户二', '', '没打分', 3)
+    + '<div id="paginator" class="center"><a class="next" href="?start=20">后页 &gt;</a></div>'
+    + '</div>'
+    + '<div class="aside"><span class="allstar30 rating" title="还行"></span>'
+    + '<span class="comment-time " title="2000-01-01 00:00:00">2000-01-01</span></div>'
+    + '</body></html>'
+)
+
+
+def test_regex_matches_soup_when_last_comment_unrated():
+    regex_comments = parse_comments_regex(PAGE)
+    assert regex_comments == DoubanCommentSpider._parse_comments_soup(PAGE)
+    assert [c['rating'] for c in regex_comments] == [5, '']
+
+
+def test_regex_matches_soup_without_paginator():
+    page = PAGE.replace('<div id="paginator"', '<div id="other"')
+    assert parse_comments_regex(page) == DoubanCommentSpider._parse_comments_soup(page)